@@ -3,13 +3,23 @@ Network Connectivity Checker
 Detects if system is online or offline
 """
 
+import errno
+import select
 import socket
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# connect_ex codes meaning a non-blocking connect is still in progress
+_CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN,
+                    getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
 class NetworkManager:
     """Manages network connectivity detection"""
     
@@ -17,41 +27,136 @@ class NetworkManager:
         self.is_online = False
         self.check_interval = 30  # Check every 30 seconds
         self.last_check = 0
+        self.resolve_interval = 3600  # Refresh cached google.com address hourly
+        # Probe a cached IP so DNS latency can't eat the connect budget
+        self._google_ip = '142.250.80.46'  # Fallback until first resolution
+        self._resolver_started = False  # Resolver thread starts with the first check
+        self._refresh_lock = threading.Lock()
+        # Guards is_online/last_check so a slow probe can't undo mark_offline()
+        self._status_lock = threading.Lock()
+        self._marked_offline_at = 0
+        # Reuse one pooled session so the HTTP fallback skips repeated TLS handshakes
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=2, max_retries=0))
+        self._session.headers.update({'User-Agent': 'ironman-netcheck'})
     
-    def check_internet(self) -> bool:
+    def check_internet(self, force: bool = False) -> bool:
         """
         Check if internet connection is available
+        Results are cached for check_interval seconds unless force is set
         Returns: True if online, False if offline
         """
+        started = time.monotonic()
+        if not force and not self.is_stale():
+            return self.is_online
+        
+        online = self._probe_internet()
+        with self._status_lock:
+            # A failure recorded while we were probing is newer than our result
+            if started >= self._marked_offline_at:
+                self.is_online = online
+                self.last_check = started
+            return self.is_online
+    
+    def is_stale(self) -> bool:
+        """True if the cached status is older than check_interval"""
+        return not self.last_check or time.monotonic() - self.last_check >= self.check_interval
+    
+    def refresh_async(self):
+        """Refresh a stale status on a background thread without blocking the caller"""
+        if not self.is_stale() or not self._refresh_lock.acquire(blocking=False):
+            return
+        
+        def _refresh():
+            try:
+                self.check_internet(force=True)
+            finally:
+                self._refresh_lock.release()
+        
+        threading.Thread(target=_refresh, daemon=True).start()
+    
+    def mark_offline(self):
+        """Record a failed online request so callers skip the network until the next check"""
+        with self._status_lock:
+            now = time.monotonic()
+            self.is_online = False
+            self.last_check = now
+            self._marked_offline_at = now
+    
+    def _probe_internet(self) -> bool:
+        """Run the actual connectivity probes, bypassing the cache"""
+        if not self._resolver_started:
+            self._resolver_started = True
+            threading.Thread(target=self._refresh_google_ip, daemon=True).start()
+        
         try:
-            # Try multiple DNS servers for reliability
-            for host in ['8.8.8.8', '1.1.1.1', 'google.com']:
-                try:
-                    socket.create_connection((host, 53), timeout=2)
-                    self.is_online = True
-                    logger.info(f"🟢 Online - Connected via {host}")
-                    return True
-                except (socket.timeout, socket.error):
-                    continue
+            # Probe multiple DNS servers in parallel, first success wins
+            hosts = ['8.8.8.8', '1.1.1.1', self._google_ip]
+            executor = ThreadPoolExecutor(max_workers=len(hosts))
+            try:
+                futures = {executor.submit(self._probe, host): host for host in hosts}
+                for future in as_completed(futures):
+                    if future.result():
+                        logger.info(f"🟢 Online - Connected via {futures[future]}")
+                        return True
+            finally:
+                # Don't wait on the slower probes once we have an answer
+                executor.shutdown(wait=False, cancel_futures=True)
             
-            # Fallback: Try HTTP request to Google
+            # Fallback: Try lightweight HTTP request to Google (connect, read timeouts)
             try:
-                response = requests.get('https://www.google.com', timeout=3)
-                self.is_online = True
+                self._session.get('https://www.google.com/generate_204', timeout=(1.0, 2.0))
                 logger.info("🟢 Online - HTTP connection successful")
                 return True
             except:
                 pass
             
-            self.is_online = False
             logger.warning("🔴 Offline - No internet connection detected")
             return False
             
         except Exception as e:
             logger.error(f"Error checking internet: {e}")
-            self.is_online = False
             return False
     
+    def _refresh_google_ip(self):
+        """Background loop keeping the google.com address warm"""
+        while True:
+            try:
+                self._google_ip = socket.gethostbyname('google.com')
+            except (socket.gaierror, socket.error):
+                pass  # Keep the last known address while offline
+            time.sleep(self.resolve_interval)
+    
+    @staticmethod
+    def _probe(host: str, port: int = 53, connect_timeout: float = 2) -> bool:
+        """
+        Try a single non-blocking TCP connection, True if it succeeds
+        Name resolution happens first, so connect_timeout only covers the handshake
+        """
+        try:
+            family, socktype, proto, _, addr = socket.getaddrinfo(
+                host, port, type=socket.SOCK_STREAM)[0]
+        except socket.gaierror:
+            return False
+        
+        sock = socket.socket(family, socktype, proto)
+        try:
+            sock.setblocking(False)
+            rc = sock.connect_ex(addr)
+            if rc == 0:
+                return True
+            if rc not in _CONNECT_PENDING:
+                # Immediate failure, e.g. ENETUNREACH with no route at all
+                return False
+            _, writable, errored = select.select([], [sock], [sock], connect_timeout)
+            # A refused connect is also reported as writable, so check SO_ERROR
+            return bool(writable) and not errored and \
+                sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+        except (socket.error, ValueError):
+            return False
+        finally:
+            sock.close()
+    
     def get_status(self) -> Tuple[bool, str]:
         """
         Get current network status
@@ -62,5 +167,7 @@ class NetworkManager:
         return is_online, status_msg
     
     def is_connected(self) -> bool:
-        """Quick check if currently connected"""
+        """Quick check if currently connected, probing only when never checked before"""
+        if not self.last_check:
+            return self.check_internet()
         return self.is_online
@@ -5,36 +5,112 @@ I Am Ironman - A Local Voice Assistant for your PC
 Inspired by JARVIS from Iron Man
 """
 
-import json
+import atexit
+import importlib.util
+import io
 import os
 import sys
-import time
+import queue
+import random
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
 import threading
-import speech_recognition as sr
-import pyttsx3
+import time
+import wave
+import orjson
 from datetime import datetime
+from pathlib import Path
 from secure_api_manager import SecureAPIManager, setup_api_key
+from core.network import NetworkManager
 
 class IronmanAssistant:
+    # Error backoff bounds for the main loop, in seconds
+    MIN_BACKOFF = 0.25
+    MAX_BACKOFF = 30
+    
+    # Fixed responses pre-synthesized while idle so they play without TTS latency
+    CACHED_PHRASES = (
+        "I'm here. What do you need?",
+        "I'm not sure about that command.",
+        "Sorry, I didn't catch that.",
+        "Opening Chrome",
+        "Launching VS Code",
+        "Opening Notepad",
+        "Increasing volume",
+        "Decreasing volume",
+        "Muting",
+        "Increasing brightness",
+        "Decreasing brightness",
+        "Locking screen",
+        "Going to sleep mode",
+        "Shutting down the system",
+        "Here are my commands. Check the console for details.",
+        "Goodbye, sir. It was a pleasure.",
+        "Goodbye, sir.",
+    )
+    
     def __init__(self):
+        # Heavy audio bindings are imported here so importing this module stays cheap
+        import speech_recognition as sr
+        self._sr = sr
         self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 150)
-        self.config_file = 'data/config.json'
+        self.recognizer.energy_threshold = 4000  # Fallback if calibration fails
+        self._mic = None
+        self._mic_calibrated = False
+        # Speech runs on a background worker so the main loop isn't blocked,
+        # the engine is created there since SAPI5/NSSS are tied to their thread
+        self.engine = None
+        self._phrase_cache = {}  # phrase -> rendered WAV bytes
+        self._tts_q = queue.Queue()
+        threading.Thread(target=self._tts_loop, daemon=True).start()
+        self._data_dir = Path('data')
+        self._data_dir.mkdir(exist_ok=True)
+        self.config_file = self._data_dir / 'config.json'
         self.assistant_name = None
+        self.use_cloud_asr = False
         self.is_listening = False
+        self._stop = threading.Event()
+        self._backoff = self.MIN_BACKOFF
+        # Seconds of input still dropped after the acknowledgement ends (speaker latency)
+        self.ack_tail = 0.2
+        self.network = None  # Only created when cloud ASR is enabled
+        self.vosk_model_path = 'data/vosk-model'
+        self._vosk_model = None  # Loaded in the background at startup
+        self._vosk_ready = threading.Event()
+        self._vosk_error = None
+        self._wake_phrase = None  # Assistant name as the recognizer would spell it
+        self._wake_in_vocab = False
+        try:
+            import webrtcvad
+            self._vad = webrtcvad.Vad(2)
+        except ImportError:
+            self._vad = None  # Voice activity prefilter is optional
         self.load_config()
+        if self.use_cloud_asr:
+            # Offline-first: don't probe the network unless something will use the result
+            self.network = NetworkManager()
+        self._start_vosk_loader()
         self.api_manager = SecureAPIManager()
+        self._build_system_commands()
+        self._build_command_table()
+        self.open_microphone()
+        atexit.register(self.close_microphone)
         
     def load_config(self):
         """Load or create configuration file"""
-        os.makedirs('data', exist_ok=True)
-        
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
+        if self.config_file.exists():
+            with open(self.config_file, 'rb') as f:
+                config = orjson.loads(f.read())
                 self.assistant_name = config.get('assistant_name')
+                self.use_cloud_asr = config.get('use_cloud_asr', False)
+                self.vosk_model_path = config.get('vosk_model_path', self.vosk_model_path)
+            self._check_vosk_model()
         else:
+            # Fail before asking the user anything if recognition can't work
+            self._check_vosk_model()
             self.first_run_setup()
     
     def first_run_setup(self):
@@ -68,124 +144,449 @@ class IronmanAssistant:
         """Save configuration to file"""
         config = {
             'assistant_name': self.assistant_name,
+            'use_cloud_asr': self.use_cloud_asr,
+            'vosk_model_path': self.vosk_model_path,
             'created_at': datetime.now().isoformat(),
             'version': '1.0.0'
         }
         
-        os.makedirs('data', exist_ok=True)
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(self.config_file, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+    
+    def _tts_loop(self):
+        """Background worker that drains the speech queue, caching phrases when idle"""
+        try:
+            self.engine = self._init_engine()
+        except Exception as e:
+            print(f"⚠️ TTS unavailable: {e}")
+        
+        # winsound ships with Python on Windows, simpleaudio is optional elsewhere
+        can_play_cached = sys.platform == 'win32' or importlib.util.find_spec('simpleaudio') is not None
+        pending = list(reversed(self.CACHED_PHRASES)) if can_play_cached and self.engine else []
+        
+        while True:
+            try:
+                text, done = self._tts_q.get(timeout=0.5 if pending else None)
+            except queue.Empty:
+                phrase = pending.pop()
+                try:
+                    audio = self._synth(phrase)
+                    if audio:
+                        self._phrase_cache[phrase] = audio
+                except Exception as e:
+                    print(f"⚠️ TTS cache error: {e}")
+                continue
+            
+            try:
+                played = False
+                cached = self._phrase_cache.get(text)
+                if cached:
+                    try:
+                        self._play_wav(cached)
+                        played = True
+                    except Exception as e:
+                        print(f"⚠️ Cached phrase playback failed, using TTS engine: {e}")
+                        self._phrase_cache.pop(text, None)
+                if not played and self.engine is not None:
+                    self.engine.say(text)
+                    self.engine.runAndWait()
+            except Exception as e:
+                print(f"⚠️ TTS Error: {e}")
+            finally:
+                done.set()
+                self._tts_q.task_done()
+    
+    def _init_engine(self):
+        """Create the TTS engine on the calling (worker) thread"""
+        if sys.platform == 'win32':
+            # SAPI5 is COM, which must be initialised on every thread that uses it
+            import comtypes
+            comtypes.CoInitialize()
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 150)
+        return engine
+    
+    def _synth(self, text):
+        """
+        Render text to WAV bytes with the TTS engine
+        Returns None if the driver didn't produce a WAV (macOS writes AIFF)
+        """
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            data = Path(path).read_bytes()
+        finally:
+            os.remove(path)
+        
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                wav.getparams()
+        except (wave.Error, EOFError):
+            return None
+        return data
+    
+    def _play_wav(self, data):
+        """Play in-memory WAV bytes, blocking the worker until done"""
+        if sys.platform == 'win32':
+            import winsound
+            # SND_MEMORY can't be combined with SND_ASYNC
+            winsound.PlaySound(data, winsound.SND_MEMORY)
+        else:
+            import simpleaudio
+            with wave.open(io.BytesIO(data)) as wav:
+                simpleaudio.WaveObject.from_wave_read(wav).play().wait_done()
     
     def speak(self, text):
-        """Text to speech"""
+        """
+        Text to speech (queued, returns immediately)
+        Returns: threading.Event set once the utterance has finished
+        """
         print(f"🤖 {self.assistant_name}: {text}")
+        done = threading.Event()
+        self._tts_q.put((text, done))
+        return done
+    
+    def speak_sync(self, text):
+        """Text to speech, blocking until the utterance has finished"""
+        self.speak(text).wait()
+    
+
+    def open_microphone(self):
+        """Open one long-lived microphone stream and calibrate it"""
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
+            mic = self._sr.Microphone()
+            mic.__enter__()
         except Exception as e:
-            print(f"⚠️ TTS Error: {e}")
+            print(f"⚠️ Could not open microphone: {e}")
+            return
+        self._mic = mic
+        self.calibrate_microphone()
     
-
-    def listen(self, timeout=10):
-        """Listen for voice command"""
+    def close_microphone(self):
+        """Release the microphone stream"""
+        if self._mic is not None:
+            try:
+                self._mic.__exit__(None, None, None)
+            except Exception:
+                pass  # The device may already be gone
+            finally:
+                self._mic = None
+    
+    def _discard_input_until(self, event):
+        """
+        Read and drop microphone input until event is set, plus ack_tail seconds
+        There's no echo cancellation, so input during our own playback can't be
+        separated from the user's voice and is dropped rather than overlapped
+        """
+        if self._mic is None:
+            event.wait()
+            return
+        
+        deadline = None
+        while deadline is None or time.monotonic() < deadline:
+            self._mic.stream.read(self._mic.CHUNK)
+            if deadline is None and event.is_set():
+                deadline = time.monotonic() + self.ack_tail
+    
+    def calibrate_microphone(self):
+        """Measure ambient noise once instead of before every command"""
         try:
-            with sr.Microphone() as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
-                self.recognizer.energy_threshold = 4000
-                print("🎤 Listening...")               
-                audio = self.recognizer.listen(source, timeout=timeout)
-
-            text = self.recognizer.recognize_google(audio)
+            self.recognizer.adjust_for_ambient_noise(self._mic, duration=0.8)
+            self._mic_calibrated = True
+        except Exception as e:
+            print(f"⚠️ Microphone calibration failed, using default threshold: {e}")
+    
+    def listen(self, timeout=10, wake_word=False):
+        """
+        Listen for voice command
+        With wake_word set, recognition is always offline and restricted to the
+        assistant's name when the model knows it
+        Microphone/device errors from capture propagate so run() can back off
+        """
+        if self._mic is None:
+            raise OSError("No microphone available")
+        
+        print("🎤 Listening...")
+        # Only capture errors escape, anything from recognition is handled below
+        try:
+            audio = self.recognizer.listen(self._mic, timeout=timeout)
+        except self._sr.WaitTimeoutError:
+            return None
+        
+        try:
+            if not self._has_speech(audio):
+                # Silent in the wake phase, "didn't catch that" after a prompt
+                raise self._sr.UnknownValueError()
+            
+            if wake_word:
+                text = self._recognize_wake_word(audio)
+            else:
+                text = self.recognize(audio)
             print(f"👤 You: {text}")
             return text.lower()
-        except sr.UnknownValueError:
-            self.speak("Sorry, I didn't catch that.")
-            return None
-        except sr.RequestError:
-            self.speak("Network error. Check your connection.")
+        except self._sr.UnknownValueError:
+            if not wake_word:
+                self.speak("Sorry, I didn't catch that.")
             return None
         except Exception as e:
-            if 'timed out' not in str(e).lower():
-                print(f"⚠️ Error: {e}")
+            print(f"⚠️ Error: {e}")
             return None
-            
-    def process_command(self, command):
-        """Process voice commands"""
-        # Application commands
-        if 'chrome' in command or 'google' in command:
-            self.speak("Opening Chrome")
-            os.startfile('chrome.exe') if sys.platform == 'win32' else os.system('google-chrome &')
-            return True
-        
-        elif 'vs code' in command or 'visual studio' in command:
-            self.speak("Launching VS Code")
-            os.startfile('code.exe') if sys.platform == 'win32' else os.system('code &')
-            return True
-        
-        elif 'notepad' in command or 'text editor' in command:
-            self.speak("Opening Notepad")
-            os.startfile('notepad.exe') if sys.platform == 'win32' else os.system('gedit &')
-            return True
-        
-        # Volume control
-        elif 'increase volume' in command or 'volume up' in command:
-            self.speak("Increasing volume")
-            os.system('python -c "from ctypes import *; SetVolume(100)" 2>/dev/null || true')
-            return True
-        
-        elif 'decrease volume' in command or 'volume down' in command:
-            self.speak("Decreasing volume")
-            return True
-        
-        elif 'mute' in command:
-            self.speak("Muting")
-            return True
-        
-        # Brightness control
-        elif 'increase brightness' in command or 'brighten' in command:
-            self.speak("Increasing brightness")
-            return True
-        
-        elif 'decrease brightness' in command or 'dim' in command:
-            self.speak("Decreasing brightness")
-            return True
-        
-        # System commands
-        elif 'time' in command:
-            current_time = datetime.now().strftime("%H:%M")
-            self.speak(f"The time is {current_time}")
-            return True
+    
+    def _check_vosk_model(self):
+        """Make sure vosk and the local model are present, raising a clear error if not"""
+        model_path = Path(self.vosk_model_path)
+        if importlib.util.find_spec('vosk') is None:
+            raise RuntimeError("Vosk is not installed. Run: pip install vosk")
+        if not model_path.is_dir():
+            # Never let Vosk fetch a model itself, the assistant must work offline
+            raise RuntimeError(
+                f"Vosk model not found at '{model_path}'. Download an English model from "
+                "https://alphacephei.com/vosk/models and unpack it there.")
+    
+    def _start_vosk_loader(self):
+        """Load the (already checked) Vosk model in the background"""
+        # Recognizers output lowercase words without punctuation ("J.A.R.V.I.S" -> "jarvis")
+        self._wake_phrase = ' '.join(re.sub(r"[^\w\s']", '', self.assistant_name.lower()).split()) \
+            or self.assistant_name.lower()
+        threading.Thread(target=self._load_vosk_model, args=(Path(self.vosk_model_path),),
+                         daemon=True).start()
+    
+    def _load_vosk_model(self, model_path):
+        """Load the Vosk model once, off the main thread"""
+        try:
+            from vosk import Model
+            self._vosk_model = Model(str(model_path))
+            # Vosk silently drops grammar words it doesn't know, which would make
+            # the assistant impossible to wake, so only use the grammar if it's safe
+            self._wake_in_vocab = all(
+                self._vosk_model.find_word(word) != -1 for word in self._wake_phrase.split())
+            if not self._wake_in_vocab:
+                print(f"⚠️ '{self.assistant_name}' isn't in the speech model's vocabulary, "
+                      "using full recognition for the wake word")
+        except Exception as e:
+            self._vosk_error = e
+            print(f"⚠️ Could not load Vosk model: {e}")
+        finally:
+            self._vosk_ready.set()
+    
+    def recognize(self, audio):
+        """Speech to text, locally unless cloud ASR is enabled and we're online"""
+        # Read the cached status directly, run() keeps it fresh in the background
+        if self.use_cloud_asr and self.network.is_online:
+            try:
+                return self.recognizer.recognize_google(audio)
+            except self._sr.UnknownValueError:
+                raise
+            except Exception as e:
+                # Request errors, timeouts, a missing flac binary: fall back locally
+                print(f"⚠️ Cloud recognition failed, using offline model: {e}")
+                self.network.mark_offline()
+        return self._recognize_offline(audio)
+    
+    def _recognize_wake_word(self, audio):
+        """Offline wake word check, grammar-restricted when the name is in the vocabulary"""
+        self._vosk_ready.wait()
+        phrases = [self._wake_phrase] if self._wake_in_vocab else None
+        return self._recognize_offline(audio, phrases=phrases)
+    
+    def _recognize_offline(self, audio, phrases=None):
+        """
+        Offline speech to text using Vosk
+        Passing phrases restricts recognition to that small grammar (cheap wake word)
+        """
+        self._vosk_ready.wait()
+        if self._vosk_model is None:
+            raise RuntimeError(f"Offline recognition unavailable: {self._vosk_error}")
         
-        elif 'date' in command:
-            current_date = datetime.now().strftime("%B %d, %Y")
-            self.speak(f"Today is {current_date}")
-            return True
+        from vosk import KaldiRecognizer
         
-        elif 'lock' in command or 'lock screen' in command:
-            self.speak("Locking screen")
-            os.system('rundll32.exe user32.dll,LockWorkStation' if sys.platform == 'win32' else 'gnome-screensaver-command -l')
+        if phrases:
+            rec = KaldiRecognizer(self._vosk_model, 16000, orjson.dumps(phrases + ['[unk]']).decode())
+        else:
+            rec = KaldiRecognizer(self._vosk_model, 16000)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        text = orjson.loads(rec.FinalResult()).get('text', '')
+        if not text or text == '[unk]':
+            raise self._sr.UnknownValueError()
+        return text
+    
+    def _has_speech(self, audio, min_ratio=0.2):
+        """Cheap voice activity check so silence never reaches the recognizer"""
+        if self._vad is None:
             return True
         
-        elif 'sleep' in command:
-            self.speak("Going to sleep mode")
-            os.system('rundll32.exe powrprof.dll,SetSuspendState 0,1,0' if sys.platform == 'win32' else 'systemctl suspend')
-            return True
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        frame_bytes = 480 * 2  # 30 ms of 16-bit audio at 16 kHz
+        frames = [raw[i:i + frame_bytes] for i in range(0, len(raw) - frame_bytes + 1, frame_bytes)]
+        if not frames:
+            return False
+        voiced = sum(self._vad.is_speech(frame, 16000) for frame in frames)
+        return voiced / len(frames) >= min_ratio
+            
+    def _build_system_commands(self):
+        """Resolve platform-specific system commands once"""
+        self._win = sys.platform == 'win32'
+        if self._win:
+            commands = {
+                'lock': 'rundll32.exe user32.dll,LockWorkStation',
+                'sleep': 'rundll32.exe powrprof.dll,SetSuspendState 0,1,0',
+                'shutdown': 'shutdown /s /t 60',
+            }
+        else:
+            commands = {
+                'lock': 'gnome-screensaver-command -l',
+                'sleep': 'systemctl suspend',
+                'shutdown': 'shutdown -h +1',
+            }
+        self._cmds = {name: shlex.split(cmd, posix=not self._win) for name, cmd in commands.items()}
+        self._cmds['volume_up'] = [sys.executable, '-c', 'from ctypes import *; SetVolume(100)']
         
-        elif 'shutdown' in command or 'power off' in command:
-            self.speak("Shutting down the system")
-            os.system('shutdown /s /t 60' if sys.platform == 'win32' else 'shutdown -h +1')
-            return True
+        # Resolve application binaries once instead of searching PATH per launch
+        self._apps = {
+            'chrome': shutil.which('chrome') or shutil.which('google-chrome') or shutil.which('chrome.exe'),
+            'code': shutil.which('code'),
+            'notepad': shutil.which('notepad') or shutil.which('gedit'),
+        }
+    
+    def _run_system_command(self, name):
+        """Spawn a precomputed system command without going through a shell"""
+        try:
+            subprocess.Popen(self._cmds[name], close_fds=True,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"⚠️ Command failed: {e}")
+    
+    def _launch_app(self, name):
+        """Launch a resolved application detached from the assistant"""
+        path = self._apps.get(name)
+        try:
+            if path:
+                subprocess.Popen([path], start_new_session=True,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            elif self._win:
+                # Apps registered under App Paths (e.g. Chrome) aren't on PATH
+                os.startfile(f'{name}.exe')
+            else:
+                print(f"⚠️ Could not find {name}")
+        except OSError as e:
+            print(f"⚠️ Launch failed: {e}")
+    
+    def _build_command_table(self):
+        """Compile every command keyword into one regex, in priority order"""
+        commands = [
+            # Application commands
+            (('chrome', 'google'), self._open_chrome),
+            (('vs code', 'visual studio'), self._open_vscode),
+            (('notepad', 'text editor'), self._open_notepad),
+            # Volume control
+            (('increase volume', 'volume up'), self._volume_up),
+            (('decrease volume', 'volume down'), self._volume_down),
+            (('mute', 'unmute'), self._mute),
+            # Brightness control
+            (('increase brightness', 'brighten'), self._brightness_up),
+            (('decrease brightness', 'dim'), self._brightness_down),
+            # System commands
+            (('time',), self._tell_time),
+            (('date',), self._tell_date),
+            (('lock', 'lock screen'), self._lock_screen),
+            (('sleep',), self._sleep),
+            (('shutdown', 'power off'), self._shutdown),
+            # Help
+            (('help', 'what can you do'), self._help),
+            (('goodbye', 'exit', 'quit'), self._goodbye),
+        ]
         
-        # Help
-        elif 'help' in command or 'what can you do' in command:
-            self.show_help()
-            return True
+        self._command_keywords = {}
+        for priority, (keywords, handler) in enumerate(commands):
+            for keyword in keywords:
+                self._command_keywords[keyword] = (priority, handler)
         
-        elif 'goodbye' in command or 'exit' in command or 'quit' in command:
-            self.speak("Goodbye, sir. It was a pleasure.")
-            return False
+        # Longest keywords first so 'lock screen' wins over 'lock'
+        alternation = '|'.join(re.escape(kw) for kw in sorted(self._command_keywords, key=len, reverse=True))
+        self._command_re = re.compile(rf'\b(?:{alternation})\b')
+    
+    def process_command(self, command):
+        """Process voice commands"""
+        matches = self._command_re.findall(command)
+        if not matches:
+            return None
         
-        return None
+        # Several commands may be mentioned, the earliest in the table wins
+        keyword = min(matches, key=lambda kw: self._command_keywords[kw][0])
+        _, handler = self._command_keywords[keyword]
+        return handler(command)
+    
+    def _open_chrome(self, command):
+        self.speak("Opening Chrome")
+        self._launch_app('chrome')
+        return True
+    
+    def _open_vscode(self, command):
+        self.speak("Launching VS Code")
+        self._launch_app('code')
+        return True
+    
+    def _open_notepad(self, command):
+        self.speak("Opening Notepad")
+        self._launch_app('notepad')
+        return True
+    
+    def _volume_up(self, command):
+        self.speak("Increasing volume")
+        self._run_system_command('volume_up')
+        return True
+    
+    def _volume_down(self, command):
+        self.speak("Decreasing volume")
+        return True
+    
+    def _mute(self, command):
+        self.speak("Muting")
+        return True
+    
+    def _brightness_up(self, command):
+        self.speak("Increasing brightness")
+        return True
+    
+    def _brightness_down(self, command):
+        self.speak("Decreasing brightness")
+        return True
+    
+    def _tell_time(self, command):
+        current_time = datetime.now().strftime("%H:%M")
+        self.speak(f"The time is {current_time}")
+        return True
+    
+    def _tell_date(self, command):
+        current_date = datetime.now().strftime("%B %d, %Y")
+        self.speak(f"Today is {current_date}")
+        return True
+    
+    def _lock_screen(self, command):
+        self.speak("Locking screen")
+        self._run_system_command('lock')
+        return True
+    
+    def _sleep(self, command):
+        self.speak("Going to sleep mode")
+        self._run_system_command('sleep')
+        return True
+    
+    def _shutdown(self, command):
+        self.speak("Shutting down the system")
+        self._run_system_command('shutdown')
+        return True
+    
+    def _help(self, command):
+        self.show_help()
+        return True
+    
+    def _goodbye(self, command):
+        self.speak_sync("Goodbye, sir. It was a pleasure.")
+        return False
     
     def show_help(self):
         """Show available commands"""
@@ -228,33 +629,59 @@ class IronmanAssistant:
         print("="*60 + "\n")
         
         self.is_listening = True
+        delay = 0
         
         while self.is_listening:
             try:
-                command = self.listen()
+                # Back off after errors, waking immediately if asked to stop
+                if delay and self._stop.wait(delay):
+                    break
+                delay = 0
+                
+                # Reopen a missing microphone at most once per backoff period
+                if self._mic is None:
+                    self.open_microphone()
+                    if self._mic is None:
+                        raise OSError("No microphone available")
                 
-                if not command:
-                    continue
+                if self.network is not None:
+                    self.network.refresh_async()
+                command = self.listen(wake_word=True)
                 
-                if self.assistant_name.lower() in command:
-                    self.speak("I'm here. What do you need?")
+                if command and self._wake_phrase in command:
+                    # No barge-in: speech during the prompt is dropped. Draining the
+                    # stream means capture starts the moment the prompt ends.
+                    ack_done = self.speak("I'm here. What do you need?")
+                    self._discard_input_until(ack_done)
                     command = self.listen()
                     
                     if command:
                         result = self.process_command(command)
                         
                         if result is False:
-                            self.is_listening = False
+                            self.stop()
                         elif result is None:
                             self.speak("I'm not sure about that command.")
                 
+                self._backoff = self.MIN_BACKOFF
+                
             except KeyboardInterrupt:
                 print("\n\nShutting down...")
-                self.speak("Goodbye, sir.")
-                self.is_listening = False
+                self.stop()
+                self.speak_sync("Goodbye, sir.")
             except Exception as e:
                 print(f"⚠️ Error: {e}")
-                time.sleep(1)
+                if isinstance(e, OSError):
+                    # A failed device leaves the stream unusable, reopen it after backing off
+                    self.close_microphone()
+                # Exponential backoff with jitter so persistent failures don't spin
+                delay = random.uniform(self._backoff / 2, self._backoff)
+                self._backoff = min(self._backoff * 2, self.MAX_BACKOFF)
+    
+    def stop(self):
+        """Stop the main loop, interrupting any error backoff"""
+        self.is_listening = False
+        self._stop.set()
 
 def main():
     """Main entry point"""
@@ -5,12 +5,22 @@ Handles secure storage and retrieval of API keys locally
 """
 
 import os
-import json
+import orjson
 import getpass
 from pathlib import Path
-from cryptography.fernet import Fernet
 from datetime import datetime
 
+# Encrypted key files start with this version tag, followed by the GCM nonce
+_BLOB_VERSION = b'v2'
+_NONCE_SIZE = 12
+
+
+def _secure_open(path):
+    """Open a file for binary writing, created owner-only (0o600) on Unix"""
+    if os.name == 'nt':
+        return open(path, 'wb')  # Windows doesn't support Unix permissions
+    return os.fdopen(os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb')
+
 
 class SecureAPIManager:
     """Securely manage API keys with encryption"""
@@ -20,43 +30,89 @@ class SecureAPIManager:
         self.data_dir.mkdir(exist_ok=True)
         self.key_file = self.data_dir / 'api_key.encrypted'
         self.master_key_file = self.data_dir / '.master_key'
+        self._key = None
+        self._cipher = None
 
     def _get_or_create_master_key(self):
         """Get existing or create new master encryption key"""
+        if self._key is not None:
+            return self._key
         if self.master_key_file.exists():
             with open(self.master_key_file, 'rb') as f:
-                return f.read()
+                self._key = f.read()
+            return self._key
         else:
-            # Generate new master key
-            key = Fernet.generate_key()
-            # Store master key securely (file permissions should restrict access)
-            with open(self.master_key_file, 'wb') as f:
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+            # Generate new 256-bit master key
+            key = AESGCM.generate_key(bit_length=256)
+            # Store master key securely (created with restrictive permissions)
+            with _secure_open(self.master_key_file) as f:
                 f.write(key)
-            # Set restrictive permissions (Unix only)
-            try:
-                os.chmod(str(self.master_key_file), 0o600)
-            except:
-                pass  # Windows doesn't support Unix permissions
+            self._key = key
             return key
 
-    def _encrypt_api_key(self, api_key: str) -> bytes:
-        """Encrypt API key using Fernet (symmetric encryption)"""
-        master_key = self._get_or_create_master_key()
-        cipher_suite = Fernet(master_key)
-        encrypted = cipher_suite.encrypt(api_key.encode())
-        return encrypted
-
-    def _decrypt_api_key(self, encrypted_key: bytes) -> str:
-        """Decrypt API key"""
-        master_key = self._get_or_create_master_key()
-        cipher_suite = Fernet(master_key)
+    def _cipher_suite(self):
+        """Get the cached AES-GCM cipher, building it on first use"""
+        if self._cipher is None:
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+            key = self._get_or_create_master_key()
+            if len(key) != 32:
+                # Older installs store a Fernet key, derive a separate AES key from it
+                from cryptography.hazmat.primitives import hashes
+                from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+                key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                           info=b'ironman-api-key-aesgcm').derive(key)
+            self._cipher = AESGCM(key)
+        return self._cipher
+
+    def _encrypt_api_key(self, api_key: str, provider: str) -> bytes:
+        """Encrypt API key and its metadata together using AES-256-GCM"""
+        payload = {
+            'provider': provider,
+            'created_at': datetime.now().isoformat(),
+            'key_length': len(api_key),
+            'key': api_key
+        }
+        nonce = os.urandom(_NONCE_SIZE)
+        encrypted = self._cipher_suite().encrypt(nonce, orjson.dumps(payload), _BLOB_VERSION)
+        return _BLOB_VERSION + nonce + encrypted
+
+    def _decrypt_api_key(self, encrypted_key: bytes) -> dict:
+        """Decrypt stored payload (API key plus metadata)"""
         try:
-            decrypted = cipher_suite.decrypt(encrypted_key).decode()
-            return decrypted
+            if encrypted_key.startswith(_BLOB_VERSION):
+                nonce_end = len(_BLOB_VERSION) + _NONCE_SIZE
+                nonce = encrypted_key[len(_BLOB_VERSION):nonce_end]
+                decrypted = self._cipher_suite().decrypt(nonce, encrypted_key[nonce_end:], _BLOB_VERSION)
+            else:
+                # Files written before the switch to AES-GCM are Fernet tokens
+                from cryptography.fernet import Fernet
+                decrypted = Fernet(self._get_or_create_master_key()).decrypt(encrypted_key)
         except Exception as e:
             print(f"❌ Error decrypting API key: {e}")
             return None
 
+        try:
+            payload = orjson.loads(decrypted)
+        except orjson.JSONDecodeError:
+            payload = None
+        if not isinstance(payload, dict):
+            # Older files hold only the raw key
+            payload = {'key': decrypted.decode()}
+        return payload
+
+    def _load_payload(self) -> dict:
+        """Read and decrypt the key file, None if missing or unreadable"""
+        try:
+            if not self.key_file.exists():
+                return None
+            return self._decrypt_api_key(self.key_file.read_bytes())
+        except Exception as e:
+            print(f"❌ Error retrieving API key: {e}")
+            return None
+
     def save_api_key(self, api_key: str, provider: str = 'google') -> bool:
         """
         Save API key securely
@@ -65,31 +121,19 @@ class SecureAPIManager:
             provider: Name of the API provider (google, openai, etc.)
         """
         try:
-            # Encrypt the API key
-            encrypted_key = self._encrypt_api_key(api_key)
-
-            # Create metadata
-            metadata = {
-                'provider': provider,
-                'created_at': datetime.now().isoformat(),
-                'encrypted': True,
-                'key_length': len(api_key)
-            }
-
-            # Save encrypted key and metadata
-            with open(self.key_file, 'wb') as f:
-                f.write(encrypted_key)
+            # Encrypt the API key along with its metadata
+            encrypted_key = self._encrypt_api_key(api_key, provider)
 
-            # Save metadata separately
-            with open(self.data_dir / f'{provider}_meta.json', 'w') as f:
-                json.dump(metadata, f, indent=2)
+            # Write to a temp file and swap it in so a crash never leaves a torn key
+            tmp_file = self.key_file.with_suffix('.tmp')
+            with _secure_open(tmp_file) as f:
+                f.write(encrypted_key)
+            os.replace(tmp_file, self.key_file)
 
-            # Set restrictive permissions
-            try:
-                os.chmod(str(self.key_file), 0o600)
-                os.chmod(str(self.data_dir / f'{provider}_meta.json'), 0o600)
-            except:
-                pass
+            # Metadata used to live in a separate plaintext file, drop any leftover
+            legacy_meta = self.data_dir / f'{provider}_meta.json'
+            if legacy_meta.exists():
+                legacy_meta.unlink()
 
             print(f"✅ API key for {provider} saved securely")
             return True
@@ -102,18 +146,27 @@ class SecureAPIManager:
         Retrieve and decrypt API key
         Returns None if key not found or decryption fails
         """
-        try:
-            if not self.key_file.exists():
-                return None
+        payload = self._load_payload()
+        return payload.get('key') if payload else None
 
-            with open(self.key_file, 'rb') as f:
-                encrypted_key = f.read()
-
-            decrypted_key = self._decrypt_api_key(encrypted_key)
-            return decrypted_key
-        except Exception as e:
-            print(f"❌ Error retrieving API key: {e}")
+    def get_api_key_metadata(self, provider: str = 'google') -> dict:
+        """
+        Retrieve metadata (provider, created_at, key_length) for the stored key
+        Returns None if key not found or decryption fails
+        """
+        payload = self._load_payload()
+        if not payload:
             return None
+        metadata = {k: v for k, v in payload.items() if k != 'key'}
+        if not metadata:
+            # Key files from older versions kept metadata in a plaintext sibling
+            legacy_meta = self.data_dir / f'{provider}_meta.json'
+            if legacy_meta.exists():
+                try:
+                    metadata = orjson.loads(legacy_meta.read_bytes())
+                except (OSError, orjson.JSONDecodeError) as e:
+                    print(f"❌ Error reading API key metadata: {e}")
+        return metadata
 
     def has_api_key(self, provider: str = 'google') -> bool:
         """Check if API key exists"""
@@ -124,6 +177,7 @@ class SecureAPIManager:
         try:
             if self.key_file.exists():
                 self.key_file.unlink()
+            # Metadata used to live in a separate plaintext file
             meta_file = self.data_dir / f'{provider}_meta.json'
             if meta_file.exists():
                 meta_file.unlink()